@@ -0,0 +1,184 @@
+# admission.py
+# Admission control for the routes that run models. Every user has a token bucket per
+# model and every model a cap on concurrent calls; a request over either limit is turned
+# away at once with 429 or 503 and a Retry-After header instead of queueing behind
+# seconds of CPU work. The state is a small SQLite file that all workers on the host
+# open, so the limits hold across workers rather than per process.
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import wraps
+from flask import jsonify, make_response, request
+from flask_login import current_user
+import metrics
+
+ADMISSION_DB_PATH = os.environ.get('ADMISSION_DB_PATH', os.path.join(tempfile.gettempdir(), 'admission.sqlite3'))
+# Slots held by a worker that died mid-call are freed after this long; gunicorn kills requests sooner
+LEASE_SECONDS = float(os.environ.get('ADMISSION_LEASE_SECONDS', int(os.environ.get('WEB_TIMEOUT', 120)) * 2))
+BUSY_RETRY_AFTER = 2  # seconds suggested to clients when every slot of a model is taken
+
+Limit = namedtuple('Limit', ['per_minute', 'burst', 'concurrency'])
+
+# Per model: calls per minute per user, calls a user may make back-to-back, concurrent calls per host.
+# Override with e.g. ADMISSION_LIMIT_CHATBOT=30,10,8
+LIMITS = {
+    'quiz_generator': Limit(6, 3, 2),
+    'chatbot': Limit(20, 5, 4),
+    'face': Limit(60, 10, 4),
+}
+for _model in LIMITS:
+    _override = os.environ.get(f'ADMISSION_LIMIT_{_model.upper()}')
+    if _override:
+        per_minute, burst, concurrency = _override.split(',')
+        LIMITS[_model] = Limit(float(per_minute), float(burst), int(concurrency))
+
+REJECTIONS = metrics.Counter('admission_rejections_total', 'Requests turned away by admission control',
+                             ['model', 'reason'])
+
+class Rejected(Exception):
+    """Raised when a request is over its limits; init_app turns it into a 429 or 503 response."""
+    def __init__(self, status, retry_after, message):
+        super().__init__(message)
+        self.status, self.retry_after, self.message = status, retry_after, message
+
+# --- Shared State ---
+_local = threading.local()
+
+def _connection():
+    # One connection per thread, reopened after a fork
+    if getattr(_local, 'pid', None) != os.getpid():
+        connection = sqlite3.connect(ADMISSION_DB_PATH, timeout=5, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=OFF')  # limits, not records; a crash may lose the last updates
+        connection.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+                           'updated REAL NOT NULL)')
+        connection.execute('CREATE TABLE IF NOT EXISTS leases (id INTEGER PRIMARY KEY, model TEXT NOT NULL, '
+                           'expires REAL NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_leases_model_expires ON leases (model, expires)')
+        _local.connection, _local.pid = connection, os.getpid()
+    return _local.connection
+
+@contextmanager
+def _transaction():
+    connection = _connection()
+    connection.execute('BEGIN IMMEDIATE')  # take the write lock up front, so read-then-write is atomic
+    try:
+        yield connection
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+
+def _take_token(key, limit):
+    """Takes one token from the bucket; returns 0, or the seconds until a token is available."""
+    rate, now = limit.per_minute / 60.0, time.time()
+    with _transaction() as connection:
+        row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+        tokens = limit.burst if row is None else min(limit.burst, row[0] + (now - row[1]) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        connection.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                           (key, tokens - 1, now))
+    return 0
+
+def _acquire(model, limit):
+    """Returns a lease id, or None if all of the model's slots are in use."""
+    now = time.time()
+    with _transaction() as connection:
+        connection.execute('DELETE FROM leases WHERE model = ? AND expires < ?', (model, now))
+        (in_use,) = connection.execute('SELECT COUNT(*) FROM leases WHERE model = ?', (model,)).fetchone()
+        if in_use >= limit.concurrency:
+            return None
+        return connection.execute('INSERT INTO leases (model, expires) VALUES (?, ?)',
+                                  (model, now + LEASE_SECONDS)).lastrowid
+
+def _release(lease_id):
+    with _transaction() as connection:
+        connection.execute('DELETE FROM leases WHERE id = ?', (lease_id,))
+
+def slots_in_use():
+    rows = _connection().execute('SELECT model, COUNT(*) FROM leases WHERE expires >= ? GROUP BY model',
+                                 (time.time(),)).fetchall()
+    return {(model,): count for model, count in rows}
+
+metrics.Gauge('admission_slots_in_use', 'Model calls running on this host', ['model'], function=slots_in_use,
+              shared=True)
+
+# --- Checks ---
+# If the store cannot be used, requests are admitted; the limits protect latency, not data
+def check_rate(model):
+    """Takes a token from the current user's bucket for the model, or raises Rejected (429)."""
+    client = current_user.get_id() if current_user.is_authenticated else request.remote_addr
+    try:
+        retry_after = _take_token(f'{model}:{client}', LIMITS[model])
+    except sqlite3.Error as e:
+        print(f"Admission control unavailable, admitting request: {e}")
+        return
+    if retry_after:
+        REJECTIONS.inc(model=model, reason='rate')
+        raise Rejected(429, retry_after, "You're doing that too often. Please wait a moment and try again.")
+
+@contextmanager
+def model_slot(model):
+    """Holds one of the model's concurrent-call slots, or raises Rejected (503) when all are taken."""
+    try:
+        lease_id = _acquire(model, LIMITS[model])
+    except sqlite3.Error as e:
+        print(f"Admission control unavailable, admitting request: {e}")
+        lease_id = 0
+    if lease_id is None:
+        REJECTIONS.inc(model=model, reason='busy')
+        raise Rejected(503, BUSY_RETRY_AFTER, "The server is busy right now. Please try again in a moment.")
+    try:
+        yield
+    finally:
+        if lease_id:
+            try:
+                _release(lease_id)
+            except sqlite3.Error as e:
+                print(f"Admission slot {lease_id} could not be released, it will expire: {e}")
+
+# --- Long-Lived Streams ---
+# Attendance WebSockets and dashboard event streams hold a worker thread for as long as
+# they are open. gunicorn.conf.py gives each worker WEB_STREAMS threads for them on top of
+# WEB_THREADS; a stream beyond that is turned away at once, so ordinary requests always
+# find a thread.
+STREAMS_PER_WORKER = int(os.environ.get('WEB_STREAMS', 16))
+STREAM_RETRY_AFTER = 10  # seconds suggested to clients when every stream thread is taken
+_streams = threading.BoundedSemaphore(STREAMS_PER_WORKER)
+
+def open_stream(kind):
+    """Takes one of this worker's stream threads, or raises Rejected (503); pair with close_stream()."""
+    if not _streams.acquire(blocking=False):
+        REJECTIONS.inc(model=kind, reason='streams')
+        raise Rejected(503, STREAM_RETRY_AFTER, "Too many live connections right now. Please try again shortly.")
+
+def close_stream():
+    _streams.release()
+
+def admit(model):
+    """Route decorator: rate-limits the user, then holds a model slot for the whole request."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            check_rate(model)
+            with model_slot(model):
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def init_app(app):
+    @app.errorhandler(Rejected)
+    def reject(e):
+        # The JSON endpoints get JSON; page requests get the message as text
+        if request.is_json or request.accept_mimetypes.best == 'application/json':
+            response = make_response(jsonify({'status': 'error', 'message': e.message}), e.status)
+        else:
+            response = make_response(e.message, e.status)
+        response.headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+        return response
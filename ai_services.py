@@ -1,37 +1,249 @@
 # ai_services.py
+import base64
+import io
+import pickle
+import threading
+import time
+import warnings
 import joblib
+import numpy as np
+import metrics
+
+# Feature columns, in the order the risk model was trained on
+RISK_FEATURES = ['attendance_percentage', 'avg_quiz_score', 'failed_subjects_count', 'hours_spent_on_platform']
+
+# Imputed for missing features when the model artifact carries no population values
+# of its own (platform hours are not tracked yet)
+RISK_FEATURE_DEFAULTS = [100.0, 100.0, 0.0, 3.0]
 
 # --- Placeholder functions for your ML models ---
 # You will replace these with the actual code from your model files.
 
+# Artifacts written by save_prediction_model carry this format version
+MODEL_ARTIFACT_VERSION = 1
+
+# A missing or rejected artifact is tried again after this long, not on every call (seconds)
+MODEL_LOAD_RETRY_SECONDS = 60
+
+# Loaded models, one per artifact path for the lifetime of the process
+_loaded_models = {}
+_failed_loads = {}  # artifact path -> time of the last failed load
+_loaded_models_lock = threading.Lock()
+
 def load_prediction_model(path='ml_models/trained_model.pkl'):
-    """Loads the trained risk prediction model."""
+    """Loads the trained risk prediction model once per process."""
+    with _loaded_models_lock:
+        if path not in _loaded_models:
+            if time.monotonic() - _failed_loads.get(path, -MODEL_LOAD_RETRY_SECONDS) < MODEL_LOAD_RETRY_SECONDS:
+                return None
+            model = _load_model_artifact(path)
+            if model is None:
+                _failed_loads[path] = time.monotonic()  # a fixed artifact is picked up on the next retry
+                return None
+            _loaded_models[path] = model
+        return _loaded_models[path]
+
+def _load_model_artifact(path):
     try:
-        model = joblib.load(path)
-        print("Prediction model loaded successfully.")
-        return model
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            # mmap_mode maps NumPy arrays of joblib-format artifacts read-only, so forked
+            # workers share those pages; scikit-learn trees copy their node arrays when
+            # unpickled, so for forests the preloaded master's pages do most of the sharing
+            artifact = joblib.load(path, mmap_mode='r')
     except FileNotFoundError:
         print("Prediction model file not found. Please check the path.")
         return None
 
+    trained_versions = {w.message.original_sklearn_version for w in caught
+                        if type(w.message).__name__ == 'InconsistentVersionWarning'}
+    problem = _check_model_artifact(artifact, trained_versions)
+    if problem:
+        print(f"Prediction model rejected: {problem}")
+        return None
+    print("Prediction model loaded successfully.")
+    model = artifact['model'] if isinstance(artifact, dict) else artifact
+    # Fixed per model, so a student scores the same in a small batch as in a full run
+    model.feature_fill_ = list(artifact.get('feature_fill', RISK_FEATURE_DEFAULTS)) \
+        if isinstance(artifact, dict) else RISK_FEATURE_DEFAULTS
+    return model
+
+def _check_model_artifact(artifact, trained_versions):
+    """Returns a description of what is wrong with the artifact, or None if it is usable."""
+    if isinstance(artifact, dict):
+        if artifact.get('artifact_version') != MODEL_ARTIFACT_VERSION:
+            return f"artifact version {artifact.get('artifact_version')}, expected {MODEL_ARTIFACT_VERSION}"
+        features, model = list(artifact.get('features', [])), artifact.get('model')
+        if len(artifact.get('feature_fill', RISK_FEATURES)) != len(RISK_FEATURES):
+            return f"feature_fill has {len(artifact['feature_fill'])} values, expected {len(RISK_FEATURES)}"
+    else:
+        model = artifact
+        features = list(getattr(model, 'feature_names_in_', RISK_FEATURES))
+
+    if not hasattr(model, 'predict_proba'):
+        return f"{type(model).__name__} has no predict_proba"
+    if features != RISK_FEATURES or getattr(model, 'n_features_in_', len(RISK_FEATURES)) != len(RISK_FEATURES):
+        return f"feature schema {features}, expected {RISK_FEATURES}"
+
+    if trained_versions:
+        import sklearn
+        running_major = sklearn.__version__.split('.')[0]
+        for version in trained_versions:
+            if version.split('.')[0] != running_major:
+                return f"trained with scikit-learn {version}, running {sklearn.__version__}"
+        print(f"Warning: prediction model was trained with scikit-learn {', '.join(sorted(trained_versions))}, "
+              f"running {sklearn.__version__}.")
+    return None
+
+def save_prediction_model(model, path, features=RISK_FEATURES, feature_fill=RISK_FEATURE_DEFAULTS):
+    """
+    Saves a trained model together with its feature schema and the values imputed
+    for missing features, e.g. the training set's column means. The file is written
+    uncompressed so load_prediction_model can memory-map its arrays.
+    """
+    artifact = {'artifact_version': MODEL_ARTIFACT_VERSION, 'features': list(features),
+                'feature_fill': [float(value) for value in feature_fill], 'model': model}
+    joblib.dump(artifact, path)
+
+def get_risk_level(risk_score):
+    """Maps a risk probability to the band shown on the dashboards."""
+    if risk_score >= 0.7:
+        return "High"
+    if risk_score >= 0.4:
+        return "Medium"
+    return "Low"
+
+def fill_missing_features(feature_matrix, fill=RISK_FEATURE_DEFAULTS):
+    """
+    Replaces missing values (NaN) with fixed per-feature values, never statistics of
+    the batch itself, so a student's score does not depend on who is scored with them.
+    """
+    feature_matrix = np.array(feature_matrix, dtype=float)
+    missing = np.isnan(feature_matrix)
+    if missing.any():
+        feature_matrix[missing] = np.take(np.asarray(fill, dtype=float), np.nonzero(missing)[1])
+    return feature_matrix
+
+def get_risk_predictions(model, feature_matrix):
+    """
+    Scores many students with a single predict_proba call.
+    - feature_matrix has one row per student, columns in RISK_FEATURES order
+    Returns a list of (risk_level, risk_score) tuples in row order.
+    """
+    if model is None:
+        return [("Model not loaded", 0.0)] * len(feature_matrix)
+    if len(feature_matrix) == 0:
+        return []
+
+    fill = getattr(model, 'feature_fill_', RISK_FEATURE_DEFAULTS)
+    with metrics.time_model('risk_predict'), warnings.catch_warnings():
+        # The model was fitted on a DataFrame; we score plain NumPy matrices in the same column order
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        probabilities = model.predict_proba(fill_missing_features(feature_matrix, fill))
+    # Column of the "at risk" class (label 1)
+    at_risk_column = list(model.classes_).index(1) if 1 in model.classes_ else -1
+    risk_scores = probabilities[:, at_risk_column]
+    return [(get_risk_level(score), float(score)) for score in risk_scores]
+
 def get_risk_prediction(model, student_data):
     """
     Takes the model and student data to return a risk prediction.
-    - student_data should be a list or array in the format your model expects,
-      e.g., [attendance_percentage, avg_assignment_score, avg_quiz_score]
+    - student_data is one row in RISK_FEATURES order, e.g.
+      [attendance_percentage, avg_quiz_score, failed_subjects_count, hours_spent_on_platform]
     """
-    if model is None:
-        return "Model not loaded", 0.0
-
-    # This is an example; you'll need to format the data exactly as your model was trained
-    # prediction = model.predict([student_data])
-    # probability = model.predict_proba([student_data])
-    
-    # Returning mock data for now
-    risk_level = "High" if student_data[0] < 75 else "Low"
-    risk_score = 0.85 if risk_level == "High" else 0.25
-    
-    return risk_level, risk_score
+    return get_risk_predictions(model, [student_data])[0]
+
+# --- Face Matching ---
+# face_recognition's default: encodings closer than this are the same person
+FACE_MATCH_TOLERANCE = 0.6
+
+# Written by encode_faces.py: [usernames, encodings]
+FACE_INDEX_PATH = 'EncodeFile.p'
+
+class FaceIndex:
+    """Enrolled students as one (students, 128) matrix, rows aligned with usernames."""
+    def __init__(self, usernames, encodings):
+        self.usernames = list(usernames)
+        self.encodings = np.ascontiguousarray(encodings, dtype=np.float64).reshape(-1, 128)
+
+_face_indexes = {}
+
+def load_face_index(path=FACE_INDEX_PATH):
+    """Loads the enrolled face encodings once per process."""
+    with _loaded_models_lock:
+        if path not in _face_indexes:
+            try:
+                with open(path, 'rb') as f:
+                    usernames, encodings = pickle.load(f)
+            except FileNotFoundError:
+                print("Face encodings file not found. Run encode_faces.py first.")
+                return None  # Not cached, so a newly encoded file is picked up on the next call
+            _face_indexes[path] = FaceIndex(usernames, encodings)
+            print(f"Face index loaded with {len(usernames)} students.")
+        return _face_indexes[path]
+
+def decode_image(data):
+    """Decodes raw image bytes, or a base64 data URL as sent by the browser, into an RGB array."""
+    from PIL import Image
+    if isinstance(data, str):
+        data = base64.b64decode(data.split(',', 1)[1] if data.startswith('data:') else data)
+    with metrics.time_model('image_decode'):
+        return np.asarray(Image.open(io.BytesIO(data)).convert('RGB'))
+
+def detect_faces(image):
+    """Face boxes as (top, right, bottom, left) tuples."""
+    import face_recognition
+    with metrics.time_model('face_detect'):
+        return face_recognition.face_locations(image)
+
+def encode_faces(image, locations=None):
+    """
+    Encodes the faces at locations (all detected faces by default) in one call.
+    Returns (locations, encodings).
+    """
+    import face_recognition
+    if locations is None:
+        locations = detect_faces(image)
+    if not locations:
+        return [], np.empty((0, 128))
+    with metrics.time_model('face_encode'):
+        encodings = face_recognition.face_encodings(image, known_face_locations=locations)
+    return locations, np.asarray(encodings)
+
+def face_distance_matrix(known_encodings, probe_encodings):
+    """
+    Euclidean distances between every probe and every known face encoding, shape
+    (probes, known), as one matrix product instead of a face_distance call per probe.
+    """
+    known = np.asarray(known_encodings, dtype=np.float64).reshape(-1, 128)
+    probes = np.asarray(probe_encodings, dtype=np.float64).reshape(-1, 128)
+    with metrics.time_model('face_match'):
+        # |p - k|^2 = |p|^2 + |k|^2 - 2 p.k
+        squared = (probes ** 2).sum(axis=1)[:, None] + (known ** 2).sum(axis=1)[None, :] - 2.0 * probes @ known.T
+        return np.sqrt(np.maximum(squared, 0.0))
+
+def identify_faces(face_index, encodings, tolerance=FACE_MATCH_TOLERANCE):
+    """
+    Matches face encodings against the enrolled students with one distance matrix.
+    Returns a (username, distance) pair per encoding; username is None above tolerance.
+    """
+    if face_index is None or not face_index.usernames or len(encodings) == 0:
+        return [(None, None)] * len(encodings)
+    distances = face_distance_matrix(face_index.encodings, encodings)
+    best = distances.argmin(axis=1)
+    return [(face_index.usernames[student] if distances[probe, student] <= tolerance else None,
+             float(distances[probe, student])) for probe, student in enumerate(best)]
+
+def match_faces(face_index, encodings, tolerance=FACE_MATCH_TOLERANCE):
+    """
+    Returns {username: distance} for the students recognized among the encodings;
+    a student matched by several faces keeps the closest one.
+    """
+    matches = {}
+    for username, distance in identify_faces(face_index, encodings, tolerance):
+        if username is not None and distance < matches.get(username, np.inf):
+            matches[username] = distance
+    return matches
 
 def generate_quiz_questions(topic, level='hard'):
     """
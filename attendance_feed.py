@@ -0,0 +1,93 @@
+# attendance_feed.py
+# Pushes attendance events to the teachers watching a session. Events are rows in the
+# database, written in the same transaction as the attendance records, so every worker
+# can see them; one publisher thread per worker tails the table and hands each event to
+# the queues of the streams connected to that worker. A shared generation counter
+# (see session_registry.py) wakes the publishers on this host as soon as events commit.
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from session_registry import GenerationCounter
+
+ATTENDANCE_FEED_PATH = os.environ.get('ATTENDANCE_FEED_PATH',
+                                      os.path.join(tempfile.gettempdir(), 'attendance_events.gen'))
+# How often publishers read the table without a wake-up, for events written on other hosts (seconds)
+ATTENDANCE_FEED_POLL = float(os.environ.get('ATTENDANCE_FEED_POLL', 5))
+FEED_TICK = 0.2  # seconds between checks of the counter
+
+# Ids are assigned at insert but become visible at commit, so a later id can show up
+# first; the publisher re-reads this many ids behind the newest it has seen
+FEED_LOOKBACK_IDS = 200
+
+class AttendanceFeed:
+    """
+    load_since(after_id) returns the events with a greater id as (id, session_id, event)
+    rows in id order, event being a JSON-serializable dict; latest_id() returns the
+    newest id in the table. Both are called from the publisher thread.
+    """
+    def __init__(self, load_since, latest_id, path=ATTENDANCE_FEED_PATH, poll=ATTENDANCE_FEED_POLL):
+        self._load_since = load_since
+        self._latest_id = latest_id
+        self.poll = poll
+        self.counter = GenerationCounter(path)
+        self._subscribers = defaultdict(set)  # session id -> queues of connected streams
+        self._lock = threading.Lock()
+        self._publisher_pid = None
+
+    def subscribe(self, session_id):
+        """A queue that receives (id, event) pairs for the session until unsubscribed."""
+        subscription = queue.Queue()
+        with self._lock:
+            # Started lazily in each serving process; threads do not survive a fork
+            if self._publisher_pid != os.getpid():
+                self._publisher_pid = os.getpid()
+                threading.Thread(target=self._publish_forever, daemon=True).start()
+            self._subscribers[session_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, session_id, subscription):
+        with self._lock:
+            self._subscribers[session_id].discard(subscription)
+            if not self._subscribers[session_id]:
+                del self._subscribers[session_id]
+
+    def notify(self):
+        """Call after committing events; publishers on this host read them within FEED_TICK."""
+        self.counter.increment()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def _publish_forever(self):
+        last_id, seen, generation, next_poll = None, set(), None, 0.0
+        while True:
+            time.sleep(FEED_TICK)
+            if not self._subscribers:
+                last_id = None  # the snapshots of the next streams cover whatever happens meanwhile
+                continue
+            current = self.counter.value()
+            if last_id is not None and current == generation and time.monotonic() < next_poll:
+                continue
+            generation, next_poll = current, time.monotonic() + self.poll
+            try:
+                if last_id is None:
+                    last_id, seen = self._latest_id() or 0, set()
+                rows = self._load_since(max(0, last_id - FEED_LOOKBACK_IDS))
+            except Exception as e:
+                print(f"Attendance feed could not read events: {e}")
+                continue
+            # Streams drop events already in their snapshot, so re-reading the lookback is harmless
+            for event_id, session_id, event in rows:
+                if event_id in seen:
+                    continue
+                seen.add(event_id)
+                last_id = max(last_id, event_id)
+                with self._lock:
+                    subscriptions = list(self._subscribers.get(session_id, ()))
+                for subscription in subscriptions:
+                    subscription.put((event_id, event))
+            seen = {event_id for event_id in seen if event_id > last_id - FEED_LOOKBACK_IDS}
@@ -0,0 +1,21 @@
+# background_jobs.py
+# Runs the attendance session watcher and the risk rescorer, once per deployment, in a
+# process of their own next to gunicorn:  python background_jobs.py
+# They stay out of the gunicorn master, whose workers must fork from a single-threaded process.
+import time
+import metrics
+from server import start_background_workers # Imports from the configured server file
+
+def run_background_jobs():
+    """Starts the background threads and keeps the process alive until interrupted."""
+    start_background_workers()
+    metrics.start_snapshot_writer()  # the rescorer's model timings show up in /metrics
+    print("Attendance watcher and risk rescorer running; Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("Background jobs stopped.")
+
+if __name__ == '__main__':
+    run_background_jobs()
@@ -0,0 +1,233 @@
+# benchmark.py
+# Offline latency/throughput benchmarks for face recognition, quiz generation and
+# the chatbot. Runs CPU-only on synthetic or fixture data; point the model env
+# variables at small local stand-ins for quick runs, e.g.
+#   QUIZ_QG_MODEL=./models/tiny-t5 QUIZ_FILL_MASK_MODEL=./models/tiny-bert \
+#   CHATBOT_MODEL=./models/tiny-gpt2 python benchmark.py --output bench.json
+#   python benchmark.py --compare bench.json   # exits 1 on a regression
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+SUITES = ['face', 'quiz', 'chatbot']
+
+SAMPLE_CONTEXT = (
+    "Photosynthesis is a crucial process used by plants, algae, and some bacteria to convert light energy into "
+    "chemical energy. The process converts carbon dioxide and water into glucose and oxygen. It is essential for "
+    "life on Earth as it produces most of the planet's oxygen and serves as the primary source of energy for most ecosystems."
+)
+CHAT_PROMPTS = ["When is my next exam?", "How do I improve my attendance?", "Explain photosynthesis briefly.",
+                "What is on the weekly quiz?", "Thanks for the help!"]
+
+def measure(fn, repeat, items=1, warmup=1):
+    """Times fn() repeat times after warmup calls; items is how many inputs one call processes."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'repeat': repeat,
+        'items': items,
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'min_ms': round(timings[0], 3),
+        'items_per_s': round(items * 1000 / statistics.fmean(timings), 2),
+    }
+
+def timed_once(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, {'once_ms': round((time.perf_counter() - start) * 1000, 3)}
+
+# --- Face Recognition ---
+def face_frames(image_path, count):
+    """JPEG data URLs as sent by the attendance page: a fixture image, or synthetic frames."""
+    from PIL import Image
+    if image_path:
+        image = Image.open(image_path).convert('RGB')
+    else:
+        rng = np.random.default_rng(0)
+        image = Image.fromarray(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return [f'data:image/jpeg;base64,{encoded}'] * count
+
+def decode_frame(data_url):
+    from PIL import Image
+    _, encoded = data_url.split(',', 1)
+    return np.asarray(Image.open(io.BytesIO(base64.b64decode(encoded))).convert('RGB'))
+
+def bench_face(args, results):
+    from ai_services import face_distance_matrix
+
+    # Matching needs only NumPy, so it runs even where dlib is not installed
+    rng = np.random.default_rng(0)
+    for enrolled in args.enrollment_sizes:
+        known = rng.normal(0, 0.1, (enrolled, 128))
+        for batch in args.batch_sizes:
+            probes = rng.normal(0, 0.1, (batch, 128))
+            results[f'face.match[enrolled={enrolled},batch={batch}]'] = measure(
+                lambda: face_distance_matrix(known, probes).argmin(axis=1), args.repeat, items=batch)
+
+    import face_recognition
+    for batch in args.batch_sizes:
+        frames = face_frames(args.image, batch)
+        images = [decode_frame(frame) for frame in frames]
+        # Synthetic frames have no real faces, so encoding runs on a fixed box instead of detections
+        height, width = images[0].shape[:2]
+        box = [(height // 4, width * 3 // 4, height * 3 // 4, width // 4)]
+        results[f'face.decode[batch={batch}]'] = measure(
+            lambda: [decode_frame(frame) for frame in frames], args.repeat, items=batch)
+        results[f'face.detect[batch={batch}]'] = measure(
+            lambda: [face_recognition.face_locations(image) for image in images], args.repeat, items=batch)
+        results[f'face.encode[batch={batch}]'] = measure(
+            lambda: [face_recognition.face_encodings(image, known_face_locations=box) for image in images],
+            args.repeat, items=batch)
+
+# --- Quiz Generation ---
+def bench_quiz(args, results):
+    with contextlib.redirect_stdout(io.StringIO()):
+        quiz_generator, results['quiz.load_models'] = timed_once(lambda: __import__('ml_models.quiz_generator_v3',
+                                                                                   fromlist=['generate_quiz_v3']))
+    doc = quiz_generator.nlp(SAMPLE_CONTEXT)
+    answer = next(chunk.text for chunk in doc.noun_chunks if len(chunk.text.split()) > 1)
+    sentence = next(sent.text for sent in doc.sents if answer in sent.text)
+    mask_token = quiz_generator.mask_filler.tokenizer.mask_token
+
+    for batch in args.batch_sizes:
+        contexts = [SAMPLE_CONTEXT] * batch
+        results[f'quiz.spacy[batch={batch}]'] = measure(
+            lambda: list(quiz_generator.nlp.pipe(contexts)), args.repeat, items=batch)
+        results[f'quiz.question_generation[batch={batch}]'] = measure(
+            lambda: quiz_generator.question_generator([f"<hl> {answer} <hl> {sentence}"] * batch, max_length=64),
+            args.repeat, items=batch)
+        results[f'quiz.fill_mask[batch={batch}]'] = measure(
+            lambda: quiz_generator.mask_filler([sentence.replace(answer, mask_token)] * batch),
+            args.repeat, items=batch)
+
+    def end_to_end():
+        random.seed(0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            quiz_generator.generate_quiz_v3(SAMPLE_CONTEXT)
+    results['quiz.generate_quiz_v3'] = measure(end_to_end, args.repeat)
+
+# --- Chatbot ---
+def bench_chatbot(args, results):
+    from ml_models.chatbot_v2_web import WebChatbot
+    chatbot, results['chatbot.load_model'] = timed_once(WebChatbot)
+
+    # Latency grows with the history fed back as context, so each turn count is timed separately
+    for turns in args.batch_sizes:
+        def conversation():
+            chatbot.chat_history = []
+            for i in range(turns):
+                chatbot.get_response(CHAT_PROMPTS[i % len(CHAT_PROMPTS)])
+        results[f'chatbot.get_response[turns={turns}]'] = measure(conversation, args.repeat, items=turns)
+
+BENCHMARKS = {'face': bench_face, 'quiz': bench_quiz, 'chatbot': bench_chatbot}
+
+def run(args):
+    random.seed(0)
+    np.random.seed(0)
+    try:
+        from transformers import set_seed
+        set_seed(0)
+    except ImportError:
+        pass
+
+    results, skipped = {}, {}
+    for suite in args.suites:
+        print(f"Running {suite} benchmarks...")
+        try:
+            BENCHMARKS[suite](args, results)
+        except ImportError as e:
+            # Stages measured before the missing dependency was needed are kept
+            skipped[suite] = f"missing dependency: {e.name}"
+            print(f"Skipping the rest of {suite}: {skipped[suite]}")
+
+    return {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'models': {name: os.environ.get(name) for name in
+                       ('QUIZ_SPACY_MODEL', 'QUIZ_QG_MODEL', 'QUIZ_FILL_MASK_MODEL', 'CHATBOT_MODEL')},
+            'args': {'suites': args.suites, 'repeat': args.repeat, 'batch_sizes': args.batch_sizes,
+                     'enrollment_sizes': args.enrollment_sizes, 'image': args.image},
+        },
+        'skipped': skipped,
+        'results': results,
+    }
+
+def compare(baseline, current, threshold):
+    """Prints p50 changes against a baseline run; returns the names of regressed benchmarks."""
+    regressions = []
+    print(f"\n{'benchmark':60} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, stats in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before or 'p50_ms' not in stats:
+            continue
+        change = stats['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:60} {before['p50_ms']:9.2f}ms {stats['p50_ms']:9.2f}ms {change:+8.1%}{flag}")
+    return regressions
+
+def int_list(value):
+    return [int(part) for part in value.split(',')]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark face recognition, quiz generation and chatbot latency.")
+    parser.add_argument('--suites', type=lambda value: value.split(','), default=SUITES,
+                        help="comma-separated subset of: " + ', '.join(SUITES))
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument('--batch-sizes', type=int_list, default=[1, 4, 16],
+                        help="frames, prompts or chat turns per call")
+    parser.add_argument('--enrollment-sizes', type=int_list, default=[100, 1000, 10000],
+                        help="known faces to match against")
+    parser.add_argument('--image', help="fixture photo for the face stages (default: synthetic frames)")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="baseline JSON from an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.2, help="p50 slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+            sys.exit(1)
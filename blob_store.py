@@ -0,0 +1,53 @@
+# blob_store.py
+import hashlib
+import os
+import tempfile
+
+# Uploaded files live under BLOB_ROOT, named by the SHA-256 of their content,
+# so the same file handed in by many students is stored once
+BLOB_ROOT = os.path.abspath(os.environ.get('BLOB_ROOT', os.path.join('uploads', 'blobs')))
+
+def blob_path(sha256):
+    return os.path.join(BLOB_ROOT, sha256[:2], sha256[2:4], sha256)
+
+class BlobUpload:
+    """
+    Temporary file inside the blob store that hashes bytes as they are written.
+    Werkzeug writes each chunk of a multipart upload straight into it, so an upload
+    never sits in worker memory and is never copied after it arrives.
+    """
+    def __init__(self):
+        tmp_dir = os.path.join(BLOB_ROOT, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        # read, seek, tell, ... as used by werkzeug's FileStorage
+        return getattr(self._file, name)
+
+    def commit(self):
+        """Moves the upload to its content address and returns (sha256, size)."""
+        self._file.close()
+        sha256 = self._digest.hexdigest()
+        path = blob_path(sha256)
+        if os.path.exists(path):
+            os.remove(self._file.name)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._file.name, path)  # atomic, so readers never see a partial blob
+        return sha256, self.size
+
+    def close(self):
+        """Discards the temporary file unless it was committed."""
+        self._file.close()
+        try:
+            os.remove(self._file.name)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,63 @@
+# check_query_plans.py
+# Fails (exit code 1) when one of the hot queries does a full table scan.
+# Runs against an in-memory SQLite database by default; point DATABASE_URL at a
+# local MySQL stand-in to check the production planner instead.
+import os
+import sys
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from server import app, db, User, Teacher, AttendanceSession, Assignment, Complaint # Imports from the configured server file
+
+# The queries behind the teacher dashboard, attendance start/stop and polls, and the complaints view
+HOT_QUERIES = {
+    'active session of a teacher': lambda teacher_id: AttendanceSession.query.filter_by(teacher_id=teacher_id, is_active=True),
+    'any active session': lambda teacher_id: AttendanceSession.query.filter_by(is_active=True),
+    'assignments of a teacher': lambda teacher_id: Assignment.query.filter_by(teacher_id=teacher_id),
+    'newest complaints page': lambda teacher_id: Complaint.query.order_by(Complaint.submitted_at.desc()).limit(50),
+}
+
+def seed_sample_rows():
+    """Gives the planner some rows to work with; rolled back after the check."""
+    user = User(username='plan-check-teacher', password_hash='-', role='teacher')
+    teacher = Teacher(full_name='Plan Check', user=user)
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all([AttendanceSession(teacher_id=teacher.id, is_active=(i == 0)) for i in range(200)])
+    db.session.add_all([Assignment(title=f'Assignment {i}', teacher_id=teacher.id) for i in range(200)])
+    db.session.add_all([Complaint(message=f'Complaint {i}') for i in range(200)])
+    db.session.flush()
+    return teacher.id
+
+def full_scans(sql):
+    """Returns the planner lines that read a whole table or sort without an index."""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        plan = [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+        return [line for line in plan
+                if (line.startswith('SCAN') and 'USING' not in line) or 'TEMP B-TREE' in line]
+    if dialect == 'mysql':
+        plan = db.session.execute(db.text(f'EXPLAIN {sql}')).mappings().all()
+        return [f"{row['table']}: type={row['type']} {row['Extra'] or ''}" for row in plan
+                if row['type'] == 'ALL' or 'filesort' in (row['Extra'] or '')]
+    raise SystemExit(f"Query plan checks are not implemented for {dialect}.")
+
+def check_query_plans():
+    failures = 0
+    with app.app_context():
+        teacher_id = seed_sample_rows()
+        try:
+            for name, build_query in HOT_QUERIES.items():
+                statement = build_query(teacher_id).statement
+                sql = str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+                scans = full_scans(sql)
+                print(f"{'FULL SCAN' if scans else 'ok':9} {name}")
+                for line in scans:
+                    print(f"          {line}")
+                failures += bool(scans)
+        finally:
+            db.session.rollback()
+    return failures
+
+if __name__ == '__main__':
+    sys.exit(1 if check_query_plans() else 0)
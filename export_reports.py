@@ -0,0 +1,62 @@
+# export_reports.py
+import argparse
+import sys
+import time
+from contextlib import nullcontext
+from datetime import date
+from server import (app, REPORTS, report_rows, stream_csv, stream_json, stream_arrow, buffered,
+                    arrow_schema, arrow_batches) # Imports from the configured server file
+
+FORMATS = ['csv', 'json', 'arrow', 'parquet']
+PARQUET_ROW_GROUP_SIZE = 64 * 1024  # rows per row group; bounds memory while writing
+
+def open_output(output, binary):
+    """The output file, or stdout left open for the caller."""
+    if output:
+        return open(output, 'wb') if binary else open(output, 'w', newline='')
+    return nullcontext(sys.stdout.buffer if binary else sys.stdout)
+
+def counted(rows, totals):
+    for row in rows:
+        totals['rows'] += 1
+        yield row
+
+def export_report(report, export_format='csv', output=None, start=None, end=None):
+    """
+    Writes a report read in keyset batches, so memory stays flat however many rows
+    the date range covers. Arrow and Parquet need pyarrow.
+    """
+    header, types = map(list, zip(*REPORTS[report]))
+    totals = {'rows': 0}
+    started = time.time()
+    with app.app_context():
+        rows = counted(report_rows(report, start, end), totals)
+        if export_format == 'parquet':
+            import pyarrow.parquet as pq
+            schema = arrow_schema(header, types)
+            with pq.ParquetWriter(output, schema) as writer:
+                for batch in arrow_batches(schema, rows, PARQUET_ROW_GROUP_SIZE):
+                    writer.write_batch(batch)
+        elif export_format == 'arrow':
+            with open_output(output, binary=True) as f:
+                for chunk in stream_arrow(header, types, rows):
+                    f.write(chunk)
+        else:
+            pieces = stream_json(header, rows) if export_format == 'json' else stream_csv(header, rows)
+            with open_output(output, binary=False) as f:
+                for chunk in buffered(pieces):
+                    f.write(chunk)
+    # Reported on stderr, so it stays out of a report written to stdout
+    print(f"Exported {totals['rows']} {report} rows in {time.time() - started:.1f}s.", file=sys.stderr)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export attendance, quiz or risk reports.")
+    parser.add_argument('report', choices=sorted(REPORTS))
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--output', help="file to write (default: stdout; required for parquet)")
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, help="first day, YYYY-MM-DD")
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, help="last day, YYYY-MM-DD")
+    args = parser.parse_args()
+    if args.format == 'parquet' and not args.output:
+        parser.error("parquet needs --output")
+    export_report(args.report, args.format, args.output, args.start, args.end)
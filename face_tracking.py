@@ -0,0 +1,70 @@
+# face_tracking.py
+# Cheap frame-to-frame face tracking for the attendance stream: boxes are matched to
+# the previous frame's by overlap, so the expensive 128-d encoding only runs for faces
+# that are new (or were lost and came back), not for every frame.
+
+def box_iou(a, b):
+    """Intersection over union of two (top, right, bottom, left) boxes."""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    intersection = max(0, bottom - top) * max(0, right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    union = area_a + area_b - intersection
+    return intersection / union if union > 0 else 0.0
+
+class Track:
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.missed = 0  # consecutive frames without a matching detection
+        self.username = None  # set once the face has been recognized
+        self.frames_since_encoding = 0
+
+class FaceTracker:
+    """
+    Greedy IoU tracker. update() takes one frame's detections and returns the tracks
+    whose face should be encoded: new tracks, and unrecognized tracks every
+    retry_every frames (the first encoding may have been of a blurred or turned face).
+    """
+    def __init__(self, iou_threshold=0.3, max_missed=5, retry_every=10):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.retry_every = retry_every
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes):
+        pairs = sorted(((box_iou(track.box, box), t, b) for t, track in enumerate(self.tracks)
+                        for b, box in enumerate(boxes)), reverse=True)
+        matched_tracks, matched_boxes = set(), set()
+        for iou, t, b in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in matched_tracks or b in matched_boxes:
+                continue
+            matched_tracks.add(t)
+            matched_boxes.add(b)
+            self.tracks[t].box = boxes[b]
+            self.tracks[t].missed = 0
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+        self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+
+        to_encode = []
+        for b, box in enumerate(boxes):
+            if b not in matched_boxes:
+                track = Track(self._next_id, box)
+                self._next_id += 1
+                self.tracks.append(track)
+                to_encode.append(track)
+        for track in self.tracks:
+            if track.missed == 0 and track.username is None and track not in to_encode:
+                track.frames_since_encoding += 1
+                if track.frames_since_encoding >= self.retry_every:
+                    to_encode.append(track)
+        for track in to_encode:
+            track.frames_since_encoding = 0
+        return to_encode
@@ -0,0 +1,53 @@
+# gunicorn.conf.py
+# Production launcher:  gunicorn -c gunicorn.conf.py server:app
+#
+# The app (and with it the quiz, chatbot and risk models) is imported once in the
+# master process; workers are forked from it and share those pages copy-on-write.
+# kill -HUP <master> restarts workers gracefully. Because the app is preloaded,
+# picking up new code needs a binary upgrade (kill -USR2, then -QUIT the old master).
+# Run python background_jobs.py alongside, once per deployment.
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', (os.cpu_count() or 1) + 1))
+os.environ['WEB_WORKERS'] = str(workers)  # read by the app, e.g. to split host-wide pool sizes
+# More than 1 selects the gthread worker. Every open attendance WebSocket or dashboard event
+# stream holds a thread, so each worker gets WEB_STREAMS threads for them on top of the
+# WEB_THREADS for ordinary requests; admission.open_stream turns away streams beyond that
+threads = int(os.environ.get('WEB_THREADS', 4)) + int(os.environ.get('WEB_STREAMS', 16))
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))  # model calls can take a while on CPU
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))  # recycle workers; cheap since they fork from the master
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+def on_starting(arbiter):
+    # Metrics snapshots left by a previous run would be counted as exited workers
+    import metrics
+    metrics.clear_snapshots()
+
+def when_ready(arbiter):
+    import server
+    server.warm_up()
+    # No threads here: workers forked from a multi-threaded master can inherit held locks.
+    # The watcher and rescorer run in their own process, see background_jobs.py
+
+def pre_fork(arbiter, worker):
+    # Moves everything loaded so far out of the collector's reach, so collections in
+    # the workers do not touch (and thereby copy) the shared model pages
+    gc.freeze()
+
+def post_fork(arbiter, worker):
+    # Pooled connections opened in the master must not be reused across processes
+    from server import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # Each worker publishes its metrics for whichever worker answers /metrics
+    import metrics
+    metrics.start_snapshot_writer()
+
+def worker_exit(arbiter, worker):
+    # The last few seconds of the worker's metrics, before it is counted as exited
+    import metrics
+    metrics.flush()
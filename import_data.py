@@ -1,39 +1,88 @@
 # import_data.py
+import argparse
 import csv
-from server import app, db, User, Student, Teacher # Imports from the configured server file
-from werkzeug.security import generate_password_hash
+import time
+from itertools import islice
+from sqlalchemy import bindparam
+from server import app, db, User, Student, Teacher, create_users # Imports from the configured server file
+from password_hashing import hash_passwords
 
-def import_csv_data():
+CHUNK_SIZE = 1000  # rows per transaction
+
+def read_chunks(path, chunk_size):
+    """Streams the CSV in lists of chunk_size rows."""
+    with open(path, newline='') as csvfile:
+        reader = csv.DictReader(csvfile)
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+def import_chunk(chunk, user_ids, update_passwords):
+    """
+    Inserts new users with their profiles and updates existing ones, all in one transaction.
+    - user_ids maps every known username to its id and is extended with the new users
+    Existing users keep their role; their profile name (and password, if asked) is updated.
+    New rows with invalid details are reported and skipped.
+    """
+    new_rows, existing_rows, seen = [], [], set()
+    for row in chunk:
+        if row['username'] in seen:
+            print(f"User '{row['username']}' appears twice in one chunk. Skipping the duplicate.")
+            continue
+        seen.add(row['username'])
+        (existing_rows if row['username'] in user_ids else new_rows).append(row)
+
+    created, rejected = create_users(new_rows)
+    user_ids.update(created)
+    for row, reason in rejected:
+        print(f"Skipping user '{row['username']}': {reason}")
+
+    if existing_rows:
+        for profile in (Student, Teacher):
+            table = profile.__table__
+            db.session.execute(
+                table.update().where(table.c.user_id == bindparam('b_user_id')).values(full_name=bindparam('b_full_name')),
+                [{'b_user_id': user_ids[row['username']], 'b_full_name': row['full_name']} for row in existing_rows])
+        if update_passwords:
+            # Hashing dominates import time, so it runs on the hashing process pool
+            hashes = dict(zip((row['username'] for row in existing_rows),
+                              hash_passwords(row['password'] for row in existing_rows)))
+            db.session.bulk_update_mappings(User, [
+                {'id': user_ids[row['username']], 'password_hash': hashes[row['username']]} for row in existing_rows
+            ])
+
+    db.session.commit()
+    return len(created), len(existing_rows)
+
+def import_csv_data(path='student_data.csv', reset=False, update_passwords=False, chunk_size=CHUNK_SIZE):
     with app.app_context():
-        print("Dropping all tables...")
-        db.drop_all()
+        if reset:
+            print("Dropping all tables...")
+            db.drop_all()
         print("Creating all tables...")
         db.create_all()
 
-        with open('student_data.csv', newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            print("Starting data import...")
-            for row in reader:
-                if User.query.filter_by(username=row['username']).first():
-                    print(f"User '{row['username']}' already exists. Skipping.")
-                    continue
-                
-                hashed_password = generate_password_hash(row['password'])
-                new_user = User(username=row['username'], password_hash=hashed_password, role=row['role'])
-                db.session.add(new_user)
-                db.session.commit()
-
-                if new_user.role == 'student':
-                    new_profile = Student(full_name=row['full_name'], user_id=new_user.id)
-                    db.session.add(new_profile)
-                elif new_user.role == 'teacher':
-                    new_profile = Teacher(full_name=row['full_name'], user_id=new_user.id)
-                    db.session.add(new_profile)
-                
-                print(f"Added user: {new_user.username} (Role: {new_user.role})")
-
-        db.session.commit()
-        print("\nData import complete!")
+        # One query up front instead of an existence check per row
+        user_ids = dict(db.session.query(User.username, User.id))
+        print(f"Starting data import ({len(user_ids)} existing users)...")
+
+        start = time.time()
+        added = updated = 0
+        for chunk in read_chunks(path, chunk_size):
+            chunk_added, chunk_updated = import_chunk(chunk, user_ids, update_passwords)
+            added += chunk_added
+            updated += chunk_updated
+            print(f"Added {added} users, updated {updated} users...")
+
+        print(f"\nData import complete in {time.time() - start:.1f}s! Added {added}, updated {updated}.")
 
 if __name__ == '__main__':
-    import_csv_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Import users from a CSV with username,password,full_name,role columns.")
+    parser.add_argument('path', nargs='?', default='student_data.csv')
+    parser.add_argument('--reset', action='store_true', help="drop and recreate all tables before importing")
+    parser.add_argument('--update-passwords', action='store_true', help="re-hash passwords of users that already exist")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    import_csv_data(args.path, reset=args.reset, update_passwords=args.update_passwords, chunk_size=args.chunk_size)
@@ -0,0 +1,289 @@
+# loadtest.py
+# HTTP load test for the Flask app against a local database stand-in.
+#
+#   DATABASE_URL=sqlite:///loadtest.db python loadtest.py seed --students 2000
+#   DATABASE_URL=sqlite:///loadtest.db FLASK_DEBUG=0 python server.py 5000
+#   python loadtest.py run --url http://127.0.0.1:5000 --clients 50 --duration 60
+#
+# Seeded accounts are lt_student_<n>, lt_teacher_<n> and lt_admin, all with --password.
+import argparse
+import http.cookiejar
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+SEED_QUIZ = [
+    {'question': 'Which gas do plants release during photosynthesis?', 'options': ['Nitrogen', 'Oxygen', 'Helium', 'Argon'],
+     'correct_answer': 'Oxygen'},
+    {'question': 'What is 7 x 8?', 'options': ['54', '56', '58', '64'], 'correct_answer': '56'},
+    {'question': 'Who wrote "Hamlet"?', 'options': ['Dickens', 'Austen', 'Shakespeare', 'Tolstoy'],
+     'correct_answer': 'Shakespeare'},
+]
+
+# Relative weight of each action per role; "login" logs the client out and in again
+TRAFFIC_MIXES = {
+    'normal': {
+        'student': {'login': 1, 'student_dashboard': 6, 'attendance_poll': 4, 'weekly_quiz': 2, 'submit_quiz': 1,
+                    'leaderboard': 2, 'academic_analysis': 2},
+        'teacher': {'login': 1, 'teacher_dashboard': 6, 'start_attendance': 1, 'view_submissions': 2},
+        'admin': {'login': 1, 'admin_dashboard': 5, 'complaints': 2},
+    },
+    # Exam week: heavy attendance polling and quiz traffic
+    'exam': {
+        'student': {'login': 2, 'student_dashboard': 3, 'attendance_poll': 8, 'weekly_quiz': 6, 'submit_quiz': 3,
+                    'leaderboard': 3, 'academic_analysis': 1},
+        'teacher': {'login': 1, 'teacher_dashboard': 4, 'start_attendance': 2, 'view_submissions': 1},
+        'admin': {'login': 1, 'admin_dashboard': 3, 'complaints': 1},
+    },
+}
+ROLE_WEIGHTS = {'student': 90, 'teacher': 9, 'admin': 1}
+
+# --- Seeding ---
+def seed(students, teachers, days, complaints, password):
+    """Bulk-inserts load-test users and history with Core statements and one shared password hash."""
+    from server import (app, db, User, Student, Teacher, AttendanceRecord, AttendanceSession, Assignment, Complaint,
+                        Quiz, QuizAttempt, WeeklyQuizStatus, save_quiz, rebuild_student_stats, rescore_students,
+                        session_registry)
+    from password_hashing import hash_password
+
+    rng = random.Random(0)
+    with app.app_context():
+        db.create_all()
+        if User.query.filter_by(username='lt_admin').first():
+            print("Load-test data is already seeded.")
+            return
+        start = time.time()
+        password_hash = hash_password(password)
+        accounts = ([(f'lt_student_{i}', 'student') for i in range(students)] +
+                    [(f'lt_teacher_{i}', 'teacher') for i in range(teachers)] + [('lt_admin', 'admin')])
+        db.session.execute(User.__table__.insert(), [{'username': username, 'password_hash': password_hash, 'role': role}
+                                                     for username, role in accounts])
+        user_ids = dict(db.session.query(User.username, User.id).filter(User.username.like('lt\\_%', escape='\\')))
+        for role, profile in (('student', Student), ('teacher', Teacher)):
+            db.session.execute(profile.__table__.insert(), [
+                {'user_id': user_ids[username], 'full_name': username.replace('_', ' ').title()}
+                for username, account_role in accounts if account_role == role])
+        student_ids = [id for (id,) in db.session.query(Student.id).join(User).filter(User.username.like('lt\\_%', escape='\\'))]
+        teacher_ids = [id for (id,) in db.session.query(Teacher.id).join(User).filter(User.username.like('lt\\_%', escape='\\'))]
+        print(f"Seeded {len(accounts)} users.")
+
+        today = date.today()
+        school_days = [day for day in (today - timedelta(days=n) for n in range(1, days * 2))
+                       if day.weekday() < 5][:days]
+        for day in school_days:
+            db.session.execute(AttendanceRecord.__table__.insert(), [
+                {'student_id': student_id, 'date': day, 'status': 'Present' if rng.random() < 0.85 else 'Absent'}
+                for student_id in student_ids])
+            db.session.execute(AttendanceSession.__table__.insert(), [
+                {'teacher_id': teacher_id, 'start_time': datetime.combine(day, datetime.min.time()), 'is_active': False}
+                for teacher_id in teacher_ids])
+        # One live session per teacher; the server's watcher closes them after three minutes
+        db.session.execute(AttendanceSession.__table__.insert(), [
+            {'teacher_id': teacher_id, 'start_time': datetime.utcnow(), 'is_active': True} for teacher_id in teacher_ids])
+        print(f"Seeded {len(school_days)} days of attendance.")
+
+        db.session.execute(Assignment.__table__.insert(), [
+            {'title': f'Assignment {n + 1}', 'teacher_id': teacher_id} for teacher_id in teacher_ids for n in range(3)])
+        db.session.execute(Complaint.__table__.insert(), [
+            {'message': f"Load test complaint {n}: the {rng.choice(['wifi', 'canteen', 'library', 'timetable'])} "
+                        f"needs attention.", 'submitted_at': datetime.utcnow() - timedelta(minutes=n)}
+            for n in range(complaints)])
+        db.session.commit()
+        session_registry.invalidate()  # Core inserts skip the ORM hooks that normally publish new sessions
+
+        # Last week's graded quiz feeds the leaderboard; this week's is open for submissions
+        week_start = today - timedelta(days=today.weekday())
+        for start_of_week in (week_start - timedelta(weeks=1), week_start):
+            if not Quiz.query.filter_by(kind='weekly', week_start=start_of_week).first():
+                save_quiz('weekly', SEED_QUIZ, week_start=start_of_week)
+        last_quiz = Quiz.query.filter_by(kind='weekly', week_start=week_start - timedelta(weeks=1)).first()
+        db.session.execute(QuizAttempt.__table__.insert(), [
+            {'quiz_id': last_quiz.id, 'student_id': student_id, 'answers': [1, 1, 2],
+             'score': float(rng.choice([0, 33.3, 66.7, 100])), 'submitted_at': datetime.combine(last_quiz.week_start, datetime.min.time()),
+             'graded_at': datetime.utcnow()}
+            for student_id in student_ids])
+        status = WeeklyQuizStatus.query.first() or WeeklyQuizStatus()
+        status.is_active = True
+        db.session.add(status)
+        db.session.commit()
+
+        rebuild_student_stats()
+        scored = rescore_students()
+        print(f"Seeded {complaints} complaints, quizzes and rollups; scored {scored} students "
+              f"in {time.time() - start:.1f}s.")
+
+# --- Load Generation ---
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirects are timed as their own request, not followed
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+class Client:
+    """One simulated user with its own cookie jar, running weighted actions until stopped."""
+    def __init__(self, base_url, role, username, password, mix, recorder, rng):
+        self.base_url, self.role, self.username, self.password = base_url, role, username, password
+        self.actions, self.weights = zip(*mix[role].items())
+        self.recorder, self.rng = recorder, rng
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                                  NoRedirect())
+        self.quiz_id = None
+        self.logged_in = False
+
+    def request(self, label, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        start = time.perf_counter()
+        status = None
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=30) as response:
+                status = response.status
+                page = response.read()
+        except urllib.error.HTTPError as e:
+            status, page = e.code, e.read()
+        except OSError:
+            page = b''
+        self.recorder.record(label, (time.perf_counter() - start) * 1000, status is not None and status < 400)
+        return page
+
+    def login(self):
+        if self.logged_in:
+            self.request('logout', '/logout')
+        self.request('login', '/login', {'username': self.username, 'password': self.password})
+        self.logged_in = True
+
+    def run(self, stop_at):
+        self.login()
+        while time.time() < stop_at:
+            action = self.rng.choices(self.actions, self.weights)[0]
+            getattr(self, action)()
+
+    def student_dashboard(self):
+        self.request('student_dashboard', '/student/dashboard')
+
+    def attendance_poll(self):
+        self.request('attendance_poll', '/student/attendance')
+
+    def weekly_quiz(self):
+        page = self.request('weekly_quiz', '/quiz/weekly')
+        match = re.search(rb'/quiz/(\d+)/submit', page)
+        if match:
+            self.quiz_id = match.group(1).decode()
+
+    def submit_quiz(self):
+        if self.quiz_id is None:
+            return self.weekly_quiz()
+        answers = {f'answer_{i}': self.rng.randrange(4) for i in range(len(SEED_QUIZ))}
+        self.request('submit_quiz', f'/quiz/{self.quiz_id}/submit', answers)
+
+    def leaderboard(self):
+        self.request('leaderboard', '/leaderboard')
+
+    def academic_analysis(self):
+        self.request('academic_analysis', '/academic_analysis')
+
+    def teacher_dashboard(self):
+        self.request('teacher_dashboard', '/teacher/dashboard')
+
+    def start_attendance(self):
+        self.request('start_attendance', '/start_attendance_session', {})
+
+    def view_submissions(self):
+        page = self.request('teacher_dashboard', '/teacher/dashboard')
+        match = re.search(rb'/view_submissions/(\d+)', page)
+        if match:
+            self.request('view_submissions', f'/view_submissions/{match.group(1).decode()}')
+
+    def admin_dashboard(self):
+        self.request('admin_dashboard', '/admin/dashboard')
+
+    def complaints(self):
+        self.request('complaints', '/admin/complaints')
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, label, latency_ms, ok):
+        with self.lock:
+            self.latencies[label].append(latency_ms)
+            if not ok:
+                self.errors[label] += 1
+
+    def report(self, elapsed):
+        def percentile(values, q):
+            return round(values[min(len(values) - 1, int(len(values) * q))], 2)
+        routes = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[label] = {'requests': len(values), 'errors': self.errors[label],
+                             'rps': round(len(values) / elapsed, 2), 'p50_ms': percentile(values, 0.50),
+                             'p95_ms': percentile(values, 0.95), 'p99_ms': percentile(values, 0.99),
+                             'max_ms': round(values[-1], 2)}
+        return routes
+
+def run(url, clients, duration, mix, students, teachers, password, ramp_up):
+    rng = random.Random(0)
+    recorder = Recorder()
+    begin = time.time()
+    stop_at = begin + ramp_up + duration
+    threads = []
+    for n in range(clients):
+        role = rng.choices(list(ROLE_WEIGHTS), list(ROLE_WEIGHTS.values()))[0]
+        username = {'student': lambda: f'lt_student_{rng.randrange(students)}',
+                    'teacher': lambda: f'lt_teacher_{rng.randrange(teachers)}',
+                    'admin': lambda: 'lt_admin'}[role]()
+        client = Client(url.rstrip('/'), role, username, password, TRAFFIC_MIXES[mix], recorder, random.Random(n))
+        thread = threading.Thread(target=client.run, args=(stop_at,), daemon=True)
+        threads.append(thread)
+        thread.start()
+        time.sleep(ramp_up / clients)
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.time() - begin)
+
+def print_report(routes):
+    print(f"\n{'route':20} {'requests':>9} {'errors':>7} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for label, stats in routes.items():
+        print(f"{label:20} {stats['requests']:9} {stats['errors']:7} {stats['rps']:8.1f} {stats['p50_ms']:7.1f}ms "
+              f"{stats['p95_ms']:7.1f}ms {stats['p99_ms']:7.1f}ms {stats['max_ms']:7.1f}ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Seed a database and load-test the app over HTTP.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help="insert load-test users and history into DATABASE_URL")
+    seed_parser.add_argument('--students', type=int, default=2000)
+    seed_parser.add_argument('--teachers', type=int, default=40)
+    seed_parser.add_argument('--days', type=int, default=30, help="school days of attendance history")
+    seed_parser.add_argument('--complaints', type=int, default=5000)
+    seed_parser.add_argument('--password', default='loadtest')
+
+    run_parser = commands.add_parser('run', help="drive traffic against a running server")
+    run_parser.add_argument('--url', default='http://127.0.0.1:5000')
+    run_parser.add_argument('--clients', type=int, default=20, help="concurrent simulated users")
+    run_parser.add_argument('--duration', type=float, default=30, help="seconds of full load")
+    run_parser.add_argument('--ramp-up', type=float, default=5, help="seconds over which clients start")
+    run_parser.add_argument('--mix', choices=sorted(TRAFFIC_MIXES), default='normal')
+    run_parser.add_argument('--students', type=int, default=2000, help="seeded students to log in as")
+    run_parser.add_argument('--teachers', type=int, default=40, help="seeded teachers to log in as")
+    run_parser.add_argument('--password', default='loadtest')
+    run_parser.add_argument('--output', help="write per-route results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.command == 'seed':
+        seed(args.students, args.teachers, args.days, args.complaints, args.password)
+    else:
+        routes = run(args.url, args.clients, args.duration, args.mix, args.students, args.teachers,
+                     args.password, args.ramp_up)
+        print_report(routes)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'args': vars(args), 'routes': routes}, f, indent=2)
@@ -0,0 +1,373 @@
+# metrics.py
+# Metrics in the Prometheus text format, served at /metrics.
+# Every process keeps its own numbers and writes them to METRICS_DIR every few seconds;
+# whichever worker answers a scrape merges the files, so one scrape covers all workers.
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter as _Counter, defaultdict
+from contextlib import contextmanager
+from flask import g, request
+
+try:
+    import fcntl
+except ImportError:  # Windows runs the single-process dev server only, so there is nothing to merge
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'student_platform_metrics'))
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+
+_registry = []
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class _Metric:
+    kind = None
+    shared = False
+
+    def __init__(self, name, description, labels=()):
+        self.name, self.description, self.labels = name, description, tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def snapshot(self):
+        """This process's values, {label values tuple: value}."""
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, into, values):
+        for key, value in values.items():
+            into[key] = into.get(key, 0) + value
+
+    def render(self, values):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples(values))
+        return lines
+
+    def _samples(self, values):
+        return [f'{self.name}{_format_labels(self.labels, key)} {value}' for key, value in values.items()]
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, description, labels=()):
+        super().__init__(name, description, labels)
+        self._values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[self._key(labels)] += amount
+
+class Gauge(_Metric):
+    """
+    Merged over the live processes by summing. A gauge whose function reads state
+    shared by all processes (the database, a host-wide file) passes shared=True and
+    is read only by the process answering the scrape.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, description, labels=(), function=None, shared=False):
+        super().__init__(name, description, labels)
+        self._values = defaultdict(float)
+        self._function = function  # called at scrape time, returns {label values tuple: value}
+        self.shared = shared
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[self._key(labels)] += amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def snapshot(self):
+        values = super().snapshot()
+        if self._function:
+            try:
+                values.update(self._function())
+            except Exception as e:
+                print(f"Metric {self.name} could not be collected: {e}")
+        return values
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(counts) for key, counts in self._values.items()}
+
+    def merge(self, into, values):
+        for key, counts in values.items():
+            if key in into:
+                into[key] = [total + count for total, count in zip(into[key], counts)]
+            else:
+                into[key] = list(counts)
+
+    def _samples(self, values):
+        lines = []
+        for key, counts in values.items():
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, [("le", bound)])} {count}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, [("le", "+Inf")])} {counts[-2]}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {counts[-2]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {counts[-1]}')
+        return lines
+
+# --- Sharing Between Processes ---
+# <pid>.json holds a process's latest snapshot. Counters and histograms of processes that
+# have exited are folded into exited.json, so totals do not drop when workers recycle;
+# gauges of exited processes are dropped.
+EXITED_SNAPSHOT = 'exited.json'
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+def _snapshot(shared=False):
+    """{metric name: {label values tuple: value}} for this process; shared gauges only if asked."""
+    return {metric.name: metric.snapshot() for metric in _registry if shared or not metric.shared}
+
+def _encode(snapshot):
+    return {name: [[list(key), value] for key, value in values.items()] for name, values in snapshot.items()}
+
+def _decode(data):
+    return {name: {tuple(key): value for key, value in values} for name, values in data.items()}
+
+def _write(filename, snapshot):
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, filename)
+    temporary = f'{path}.{threading.get_ident()}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(_encode(snapshot), f)
+    os.replace(temporary, path)  # readers never see half a file
+
+def _read(filename):
+    try:
+        with open(os.path.join(METRICS_DIR, filename)) as f:
+            return _decode(json.load(f))
+    except (OSError, ValueError):
+        return {}
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def flush():
+    """Writes this process's snapshot now, e.g. as a worker exits."""
+    if fcntl is None:
+        return
+    try:
+        _write(f'{os.getpid()}.json', _snapshot())
+    except OSError as e:
+        print(f"Metrics snapshot could not be written: {e}")
+
+def _flush_forever():
+    while True:
+        flush()
+        time.sleep(METRICS_FLUSH_SECONDS)
+
+def start_snapshot_writer():
+    """Starts writing this process's snapshot every METRICS_FLUSH_SECONDS."""
+    global _writer_pid
+    if fcntl is None:
+        return
+    # Started lazily in each process; threads do not survive a fork
+    with _writer_lock:
+        if _writer_pid != os.getpid():
+            _writer_pid = os.getpid()
+            threading.Thread(target=_flush_forever, daemon=True).start()
+
+def clear_snapshots():
+    """Removes every snapshot, e.g. when the server starts; counters begin again at zero."""
+    if os.path.isdir(METRICS_DIR):
+        for filename in os.listdir(METRICS_DIR):
+            if filename.endswith(('.json', '.tmp')):
+                os.remove(os.path.join(METRICS_DIR, filename))
+
+def _collect():
+    """This process's values merged with the live processes' and the exited totals."""
+    by_name = {metric.name: metric for metric in _registry}
+    own = _snapshot(shared=True)
+    _write(f'{os.getpid()}.json', {name: values for name, values in own.items() if not by_name[name].shared})
+    merged = {name: {} for name in by_name}
+    for name, values in own.items():
+        by_name[name].merge(merged[name], values)
+    with open(os.path.join(METRICS_DIR, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # one scrape at a time folds exited processes
+        exited, folded = _read(EXITED_SNAPSHOT), []
+        for filename in os.listdir(METRICS_DIR):
+            pid = filename[:-len('.json')]
+            if not filename.endswith('.json') or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            snapshot, alive = _read(filename), _alive(int(pid))
+            for name, values in snapshot.items():
+                metric = by_name.get(name)
+                if metric is None or metric.kind == 'gauge' and (not alive or metric.shared):
+                    continue
+                metric.merge(merged[name] if alive else exited.setdefault(name, {}), values)
+            if not alive:
+                folded.append(filename)
+        if folded:
+            _write(EXITED_SNAPSHOT, exited)
+            for filename in folded:
+                os.remove(os.path.join(METRICS_DIR, filename))
+    for name, values in exited.items():
+        if name in by_name:
+            by_name[name].merge(merged[name], values)
+    return merged
+
+def render():
+    """All registered metrics, over all processes, in the Prometheus text exposition format."""
+    if fcntl is None:
+        merged = _snapshot(shared=True)
+    else:
+        try:
+            merged = _collect()
+        except OSError as e:
+            print(f"Metrics of other processes could not be read: {e}")
+            merged = _snapshot(shared=True)
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render(merged.get(metric.name, {})))
+    return '\n'.join(lines) + '\n'
+
+# --- Shared Metrics ---
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Request latency per endpoint',
+                            ['endpoint', 'method', 'status'])
+REQUEST_DB_SECONDS = Histogram('http_request_db_seconds', 'Time spent in database queries per request',
+                               ['endpoint'])
+MODEL_SECONDS = Histogram('model_inference_seconds', 'Time inside each model call', ['model'])
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by outcome', ['cache', 'result'])
+PROCESS_INFO = Gauge('process_worker_info', 'Constant 1 per live process, labelled with its pid', ['pid'],
+                     function=lambda: {(str(os.getpid()),): 1})
+
+def time_model(model):
+    """Context manager timing one model call, e.g. with time_model('t5_generate'): ..."""
+    return MODEL_SECONDS.time(model=model)
+
+def cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+# --- Slow Request Profiling ---
+# Opt in with SLOW_REQUEST_PROFILE_MS: while requests run, a sampler thread records their
+# stacks every PROFILE_INTERVAL_MS, and requests slower than the threshold are written to
+# PROFILE_DIR as collapsed stacks, ready for flamegraph.pl or speedscope.
+SLOW_REQUEST_PROFILE_MS = float(os.environ.get('SLOW_REQUEST_PROFILE_MS', 0))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+_profiled_threads = {}  # thread id -> Counter of collapsed stacks
+_profiled_threads_lock = threading.Lock()
+_sampler_pid = None
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+def _sample_forever():
+    while True:
+        time.sleep(PROFILE_INTERVAL_MS / 1000)
+        frames = sys._current_frames()
+        with _profiled_threads_lock:
+            for thread_id, samples in _profiled_threads.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[_collapse(frame)] += 1
+
+def _start_sampler():
+    global _sampler_pid
+    # Started lazily in each serving process; threads do not survive a fork
+    with _profiled_threads_lock:
+        if _sampler_pid != os.getpid():
+            _sampler_pid = os.getpid()
+            threading.Thread(target=_sample_forever, daemon=True).start()
+
+def _dump_profile(samples, endpoint, elapsed_ms):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{endpoint}-{elapsed_ms:.0f}ms.folded')
+    with open(path, 'w') as f:
+        f.writelines(f'{stack} {count}\n' for stack, count in samples.items())
+    print(f"Slow request {request.method} {request.path} took {elapsed_ms:.0f} ms; profile written to {path}")
+
+def init_app(app):
+    """Times every request and, if enabled, profiles the slow ones."""
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        start_snapshot_writer()
+        if SLOW_REQUEST_PROFILE_MS:
+            _start_sampler()
+            with _profiled_threads_lock:
+                _profiled_threads[threading.get_ident()] = _Counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g.request_started
+        endpoint = request.endpoint or 'unknown'
+        REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+        REQUEST_DB_SECONDS.observe(g.get('query_time', 0.0), endpoint=endpoint)
+        if SLOW_REQUEST_PROFILE_MS:
+            with _profiled_threads_lock:
+                samples = _profiled_threads.pop(threading.get_ident(), None)
+            if samples and elapsed * 1000 >= SLOW_REQUEST_PROFILE_MS:
+                _dump_profile(samples, endpoint, elapsed * 1000)
+        return response
+
+    @app.teardown_request
+    def stop_profiling(exc):
+        # Requests that raised never reach after_request
+        if SLOW_REQUEST_PROFILE_MS:
+            with _profiled_threads_lock:
+                _profiled_threads.pop(threading.get_ident(), None)
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
@@ -0,0 +1,32 @@
+# migrate_db.py
+from sqlalchemy import inspect
+from server import app, db # Imports from the configured server file
+
+def migrate():
+    """
+    Brings an existing database up to the current models without dropping data:
+    creates missing tables, then the nullable columns and indexes added to tables
+    that already exist.
+    """
+    with app.app_context():
+        db.create_all()
+        inspector = inspect(db.engine)
+        for table in db.metadata.sorted_tables:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns and column.nullable:
+                    print(f"Adding column {column.name} to {table.name}...")
+                    with db.engine.begin() as connection:
+                        connection.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} '
+                                                   f'{column.type.compile(db.engine.dialect)}'))
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                # FULLTEXT indexes are MySQL-only and skipped elsewhere
+                mysql_only = index.dialect_options['mysql']['prefix'] == 'FULLTEXT'
+                if index.name not in existing and (db.engine.dialect.name == 'mysql' or not mysql_only):
+                    print(f"Creating index {index.name} on {table.name}...")
+                    index.create(db.engine)
+        print("Database is up to date.")
+
+if __name__ == '__main__':
+    migrate()
@@ -1,11 +1,16 @@
+import os
 from transformers import pipeline
+import metrics
+
+# Can be overridden, e.g. with a small local stand-in for benchmarks
+CHATBOT_MODEL = os.environ.get("CHATBOT_MODEL", "microsoft/DialoGPT-medium")
 
 class WebChatbot:
-    def __init__(self):
+    def __init__(self, model=None):
         """
         Initializes the text-generation chatbot pipeline and chat history.
         """
-        self.chatbot = pipeline("text-generation", model="microsoft/DialoGPT-medium")
+        self.chatbot = pipeline("text-generation", model=model or CHATBOT_MODEL)
         self.chat_history = []
 
     def get_response(self, user_input):
@@ -18,7 +23,8 @@ class WebChatbot:
         # Generate response using text-generation pipeline
         # Join chat history as context
         context = " ".join(self.chat_history[-5:])  # last 5 messages as context
-        outputs = self.chatbot(context, max_length=100, num_return_sequences=1)
+        with metrics.time_model('dialogpt_generate'):
+            outputs = self.chatbot(context, max_length=100, num_return_sequences=1)
         bot_response = outputs[0]['generated_text'][len(context):].strip()
 
         # Append bot response to chat history
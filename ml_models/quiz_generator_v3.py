@@ -1,14 +1,21 @@
+import os
 import spacy
 from transformers import pipeline
 import random
+import metrics
 from chatbot_v2 import start_chat_v2  # Integrate chatbot
 
+# Model names can be overridden, e.g. with small local stand-ins for benchmarks
+SPACY_MODEL = os.environ.get("QUIZ_SPACY_MODEL", "en_core_web_sm")
+QG_MODEL = os.environ.get("QUIZ_QG_MODEL", "valhalla/t5-small-qg-hl")
+FILL_MASK_MODEL = os.environ.get("QUIZ_FILL_MASK_MODEL", "distilbert-base-uncased")
+
 # Load a spaCy model to help find key phrases (potential answers)
-nlp = spacy.load("en_core_web_sm")
+nlp = spacy.load(SPACY_MODEL)
 
 # Use a smaller or CPU-optimized model for fill-mask to reduce memory usage
-question_generator = pipeline("text2text-generation", model="valhalla/t5-small-qg-hl")
-mask_filler = pipeline("fill-mask", model="distilbert-base-uncased")
+question_generator = pipeline("text2text-generation", model=QG_MODEL)
+mask_filler = pipeline("fill-mask", model=FILL_MASK_MODEL)
 
 # Mock user data for personalization
 user_data = {
@@ -32,7 +39,8 @@ def generate_quiz_v3(context: str) -> list:
     print("🤖 Analyzing text to find a key phrase for the answer...")
     
     # --- Step 1: Find a potential answer in the text ---
-    doc = nlp(context)
+    with metrics.time_model('spacy_parse'):
+        doc = nlp(context)
     # Extract noun chunks or entities as potential answers
     potential_answers = [chunk.text for chunk in doc.noun_chunks if len(chunk.text.split()) > 1]
     if not potential_answers:
@@ -56,7 +64,8 @@ def generate_quiz_v3(context: str) -> list:
     print("🤖 Generating a question for the selected answer...")
     # The model expects the answer to be highlighted with <hl> tags
     qg_input = f"<hl> {correct_answer} <hl> {input_sentence}"
-    generated_q = question_generator(qg_input, max_length=64)
+    with metrics.time_model('t5_generate'):
+        generated_q = question_generator(qg_input, max_length=64)
     question = generated_q[0]['generated_text']
     print(f"✅ Generated Question: '{question}'")
 
@@ -66,7 +75,8 @@ def generate_quiz_v3(context: str) -> list:
     masked_sentence = input_sentence.replace(correct_answer, mask_filler.tokenizer.mask_token)
     
     # Use the fill-mask model to predict words for the blank
-    predictions = mask_filler(masked_sentence)
+    with metrics.time_model('fill_mask'):
+        predictions = mask_filler(masked_sentence)
     
     # Filter predictions to get unique and different options
     distractors = []
@@ -0,0 +1,99 @@
+# password_hashing.py
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+import metrics
+
+# Werkzeug method string, e.g. "scrypt", "scrypt:65536:8:1" or "pbkdf2:sha256:1000000"
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+
+# Hashing (registration, imports) and verification (login) run on separate pools,
+# so a burst of new accounts queues behind itself instead of in front of logins.
+# The sizes are for the whole host; every web worker has its own pools, so each gets
+# its share (gunicorn.conf.py exports WEB_WORKERS; the dev server is one process).
+WEB_WORKERS = int(os.environ.get('WEB_WORKERS', 1))
+HOST_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+HOST_VERIFY_WORKERS = int(os.environ.get('PASSWORD_VERIFY_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+HASH_WORKERS = max(1, HOST_HASH_WORKERS // WEB_WORKERS)
+VERIFY_WORKERS = max(1, HOST_VERIFY_WORKERS // WEB_WORKERS)
+
+# Pool processes start from a clean fork server rather than a fork of a web worker, whose
+# other threads may hold locks at that moment; it preloads only what the pools run
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    _base_context = multiprocessing.get_context('forkserver')
+    _base_context.set_forkserver_preload([__name__])
+else:
+    _base_context = multiprocessing.get_context('spawn')
+
+_main_lock = threading.Lock()
+
+class _PoolProcess(_base_context.Process):
+    """
+    A started process re-imports the parent's __main__, which under python server.py or
+    import_data.py would load the models and create the tables again in every pool process.
+    While one is launched, __main__ is this module instead, which never imports server.
+    """
+    @staticmethod
+    def _Popen(process_obj):
+        with _main_lock:
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = sys.modules[__name__]
+            try:
+                return _base_context.Process._Popen(process_obj)
+            finally:
+                sys.modules['__main__'] = main
+
+class _PoolContext(type(_base_context)):
+    Process = _PoolProcess
+
+_mp_context = _PoolContext()
+
+_pools = {}
+_pools_lock = threading.Lock()
+_configured_prefix = None
+
+POOL_QUEUE = metrics.Gauge('password_hash_pool_queued', 'Passwords submitted to a hashing pool and not yet done',
+                           ['pool'])
+HASH_SECONDS = metrics.Histogram('password_hash_seconds', 'Time to hash or verify one password, including queueing',
+                                 ['pool'])
+
+def _pool(name, workers):
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context)
+        return _pools[name]
+
+def _run(name, workers, fn, *args):
+    POOL_QUEUE.inc(pool=name)
+    try:
+        with HASH_SECONDS.time(pool=name):
+            return _pool(name, workers).submit(fn, *args).result()
+    finally:
+        POOL_QUEUE.dec(pool=name)
+
+def hash_password(password):
+    return _run('hash', HASH_WORKERS, generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+def hash_passwords(passwords):
+    """Hashes many passwords in parallel, returning the hashes in input order."""
+    passwords = list(passwords)
+    POOL_QUEUE.inc(len(passwords), pool='hash')
+    try:
+        return list(_pool('hash', HASH_WORKERS).map(generate_password_hash, passwords,
+                                                    [PASSWORD_HASH_METHOD] * len(passwords), chunksize=32))
+    finally:
+        POOL_QUEUE.dec(len(passwords), pool='hash')
+
+def verify_password(password_hash, password):
+    return _run('verify', VERIFY_WORKERS, check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """True when the hash was made with a different algorithm or cost than PASSWORD_HASH_METHOD."""
+    global _configured_prefix
+    if _configured_prefix is None:
+        # Werkzeug stores the fully expanded method (e.g. "scrypt:32768:8:1") before the first '$'
+        _configured_prefix = generate_password_hash('', PASSWORD_HASH_METHOD).split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != _configured_prefix
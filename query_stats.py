@@ -0,0 +1,59 @@
+# query_stats.py
+import os
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Requests above either budget are logged as warnings
+QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 20))
+DB_TIME_BUDGET_MS = float(os.environ.get('DB_TIME_BUDGET_MS', 200))
+
+_route_stats = {}
+_route_stats_lock = threading.Lock()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    # Queries from background threads have no request context and are not counted
+    if has_request_context() and conn.info.get('query_started'):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        g.query_count = g.get('query_count', 0) + 1
+        g.query_time = g.get('query_time', 0.0) + elapsed
+
+def init_app(app):
+    """Records the number of queries and DB time of every request, per endpoint."""
+    @app.after_request
+    def record_query_stats(response):
+        query_count = g.get('query_count', 0)
+        db_time_ms = g.get('query_time', 0.0) * 1000
+        endpoint = request.endpoint or 'unknown'
+        with _route_stats_lock:
+            stats = _route_stats.setdefault(endpoint, {'requests': 0, 'queries': 0, 'db_time_ms': 0.0,
+                                                       'max_queries': 0, 'over_budget': 0})
+            stats['requests'] += 1
+            stats['queries'] += query_count
+            stats['db_time_ms'] += db_time_ms
+            stats['max_queries'] = max(stats['max_queries'], query_count)
+            over_budget = query_count > QUERY_BUDGET or db_time_ms > DB_TIME_BUDGET_MS
+            stats['over_budget'] += over_budget
+        if over_budget:
+            app.logger.warning(f"{request.method} {request.path} ({endpoint}) ran {query_count} queries "
+                               f"in {db_time_ms:.1f} ms (budget {QUERY_BUDGET} queries / {DB_TIME_BUDGET_MS:.0f} ms)")
+        return response
+
+def snapshot():
+    """Per-endpoint totals and averages since the process started."""
+    with _route_stats_lock:
+        return {
+            endpoint: dict(stats,
+                           avg_queries=round(stats['queries'] / stats['requests'], 2),
+                           avg_db_time_ms=round(stats['db_time_ms'] / stats['requests'], 2),
+                           db_time_ms=round(stats['db_time_ms'], 2))
+            for endpoint, stats in _route_stats.items()
+        }
@@ -0,0 +1,8 @@
+# rebuild_stats.py
+from server import app, rebuild_student_stats # Imports from the configured server file
+
+if __name__ == '__main__':
+    with app.app_context():
+        print("Rebuilding student stats rollups...")
+        rebuild_student_stats()
+        print("Rollups rebuilt.")
@@ -0,0 +1,14 @@
+# score_risk.py
+import time
+from server import app, rescore_students # Imports from the configured server file
+
+def score_all_students():
+    """Nightly job: rescores every student in one batch."""
+    with app.app_context():
+        start = time.time()
+        print("Scoring all students...")
+        scored = rescore_students()
+        print(f"Scored {scored} students in {time.time() - start:.1f}s")
+
+if __name__ == '__main__':
+    score_all_students()
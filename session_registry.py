@@ -0,0 +1,120 @@
+# session_registry.py
+# Open attendance sessions held in each worker's memory, so the per-frame "is a session
+# running?" checks are dict lookups instead of queries. Workers on one host share a
+# generation counter in a small memory-mapped file: starting or stopping a session bumps
+# it, and every worker reloads its copy from the database once it sees the new number.
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows runs the single-process dev server only
+    fcntl = None
+
+SESSION_REGISTRY_PATH = os.environ.get('SESSION_REGISTRY_PATH',
+                                       os.path.join(tempfile.gettempdir(), 'attendance_sessions.gen'))
+# Workers on other hosts cannot see the counter file; they reload at least this often (seconds)
+SESSION_REGISTRY_TTL = float(os.environ.get('SESSION_REGISTRY_TTL', 30))
+
+_COUNTER = struct.Struct('Q')
+
+ActiveSession = namedtuple('ActiveSession', ['id', 'teacher_id', 'start_time'])
+
+class GenerationCounter:
+    """A 64-bit counter in a memory-mapped file, shared by every process that maps it."""
+    def __init__(self, path):
+        self.path = path
+        self._map = None
+        self._lock = threading.Lock()
+
+    def _mapping(self):
+        if self._map is None:
+            with self._lock:
+                if self._map is None:
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < _COUNTER.size:
+                            os.ftruncate(fd, _COUNTER.size)
+                        # A shared mapping survives fork, so preloaded workers keep using it
+                        self._map = mmap.mmap(fd, _COUNTER.size)
+                    finally:
+                        os.close(fd)
+        return self._map
+
+    def value(self):
+        return _COUNTER.unpack_from(self._mapping())[0]
+
+    def increment(self):
+        mapping = self._mapping()
+        with self._lock:
+            # flock locks belong to the open file, so each increment opens its own to exclude other workers
+            fd = os.open(self.path, os.O_RDWR)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                value = _COUNTER.unpack_from(mapping)[0] + 1
+                _COUNTER.pack_into(mapping, 0, value)
+                return value
+            finally:
+                os.close(fd)  # releases the lock
+
+class SessionRegistry:
+    """
+    The open attendance session of each teacher. load() returns (id, teacher_id, start_time)
+    rows for the sessions marked active in the database; sessions older than duration count
+    as ended straight away, even before the watcher thread closes them.
+    """
+    def __init__(self, load, duration, path=SESSION_REGISTRY_PATH, ttl=SESSION_REGISTRY_TTL):
+        self._load = load
+        self.duration = timedelta(seconds=duration)
+        self.ttl = ttl
+        self.counter = GenerationCounter(path)
+        self._sessions = {}
+        self._generation = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def _stale(self, generation):
+        return generation != self._generation or self._expires <= time.monotonic()
+
+    def _current(self):
+        generation = self.counter.value()
+        stale = self._stale(generation)
+        metrics.cache_lookup('attendance_sessions', hit=not stale)
+        if stale:
+            with self._lock:
+                if self._stale(generation):
+                    # Read before loading, so a change committed during the load triggers another
+                    self._sessions = {row[1]: ActiveSession(*row) for row in self._load()}
+                    self._generation, self._expires = generation, time.monotonic() + self.ttl
+        return self._sessions
+
+    def _open(self, session, now):
+        # Sessions without a start time are never closed by the watcher either
+        return session.start_time is None or now - session.start_time < self.duration
+
+    def for_teacher(self, teacher_id):
+        """The teacher's open session, or None."""
+        session = self._current().get(teacher_id)
+        return session if session and self._open(session, datetime.utcnow()) else None
+
+    def active(self):
+        """{teacher_id: ActiveSession} for every open session."""
+        now = datetime.utcnow()
+        return {teacher_id: session for teacher_id, session in self._current().items() if self._open(session, now)}
+
+    def any_active(self):
+        now = datetime.utcnow()
+        return any(self._open(session, now) for session in self._current().values())
+
+    def invalidate(self):
+        """Call after committing a session change; every worker on this host reloads on its next lookup."""
+        self.counter.increment()
+        self._generation = None